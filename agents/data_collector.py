@@ -1,11 +1,41 @@
 # agents/data_collector.py
 
 import random
+from collections import defaultdict
 from datetime import datetime, timedelta
 from faker import Faker
 
 fake = Faker()
 
+def group_journeys_by_deal(events: list) -> dict:
+    """Group flat touchpoint events into chronological journeys keyed by deal_id"""
+    journeys = defaultdict(list)
+    for event in events:
+        journeys[event["deal_id"]].append(event)
+    return {
+        deal_id: sorted(journey, key=lambda e: e.get("timestamp", ""))
+        for deal_id, journey in journeys.items()
+    }
+
+def deal_summaries(journeys: dict) -> list:
+    """One scoring row per deal (amount, last channel and rep, touch count, deal age)"""
+    deals = []
+    for deal_id, journey in journeys.items():
+        deal_age = journey[-1].get("deal_age")
+        if deal_age is None:
+            # Sources without a deal age: days since the first touch
+            timestamps = [datetime.fromisoformat(e["timestamp"]) for e in journey if "timestamp" in e]
+            deal_age = (datetime.now() - min(timestamps)).days if timestamps else 0
+        deals.append({
+            "deal_id": deal_id,
+            "amount": float(journey[-1].get("amount", 0)),
+            "channel": journey[-1]["channel"],
+            "rep": journey[-1].get("rep", "Rep A"),
+            "touchpoints": len(journey),
+            "deal_age": deal_age
+        })
+    return deals
+
 class HubSpotClient:
     def get_associated_deals(self, contact_id):
         """Simulate fetching deals from HubSpot"""
@@ -57,6 +87,8 @@ class DataCollectorAgent:
 1))).isoformat(),
                             "rep": deal["rep"],
                             "deal_id": deal["id"],
+                            "stage": deal["properties"]["dealstage"],
+                            "deal_age": deal_age,
                             "amount": amount,
                             "converted": converted
                         })
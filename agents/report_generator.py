@@ -0,0 +1,276 @@
+# agents/report_generator.py
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from html import escape
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process use only, no cross-process lock
+    fcntl = None
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+from agents.data_collector import deal_summaries, group_journeys_by_deal
+from config.settings import Config
+from models.attribution_models import AttributionEngine
+from models.forecasting_models import ForecastingEngine
+from models.path_canonicalization import canonicalize_journeys
+
+ROOT_DIR = Path(__file__).parent.parent
+
+ATTRIBUTION_MODELS = {
+    "First Touch": "first_touch_attribution",
+    "Last Touch": "last_touch_attribution",
+    "Linear": "linear_attribution",
+    "Time Decay": "time_decay_attribution",
+    "Position Based": "position_based_attribution",
+    "ML": "ml_attribution"
+}
+
+CHART_COLORS = ["#4e79a7", "#f28e2b", "#e15759", "#76b7b2", "#59a14f", "#edc948"]
+
+
+def data_version(events: list) -> str:
+    """Stable hash of the journey store, used as the report cache key"""
+    payload = json.dumps(events, sort_keys=True, default=str).encode()
+    return hashlib.sha256(payload).hexdigest()[:16]
+
+
+class ReportGeneratorAgent:
+    """Builds the multi-model attribution report in one pass and caches it by data version"""
+
+    # A failed version is reported as failed for this long before it is retried
+    FAILURE_BACKOFF_SECONDS = 60.0
+
+    def __init__(self, attribution_engine: Optional[AttributionEngine] = None,
+                 forecasting_engine: Optional[ForecastingEngine] = None,
+                 output_dir: Optional[Path] = None, template_dir: Optional[Path] = None,
+                 max_path_length: Optional[int] = None):
+        self.attribution_engine = attribution_engine or AttributionEngine()
+        self.forecasting_engine = forecasting_engine or ForecastingEngine()
+        self.max_path_length = max_path_length
+        self.output_dir = Path(output_dir or ROOT_DIR / Config.REPORTS_DIR)
+        self.template_env = Environment(
+            loader=FileSystemLoader(str(template_dir or ROOT_DIR / Config.TEMPLATES_DIR)),
+            autoescape=select_autoescape(["html"])
+        )
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_pid: Optional[int] = None
+        self._pending: Dict[str, Future] = {}
+        self._failures: Dict[str, Tuple[float, BaseException]] = {}
+        # Reentrant: a job that already finished runs its done callback inside submit()
+        self._lock = threading.RLock()
+
+    def report_paths(self, version: str) -> Dict[str, Path]:
+        return {
+            "html": self.output_dir / f"attribution_report_{version}.html",
+            "pdf": self.output_dir / f"attribution_report_{version}.pdf"
+        }
+
+    def cached_report(self, version: str) -> Optional[Dict[str, Path]]:
+        """Return the report files for a data version if they were already generated"""
+        paths = self.report_paths(version)
+        if not paths["html"].exists():
+            return None
+        return {fmt: path for fmt, path in paths.items() if path.exists()}
+
+    def failed_report(self, version: str) -> Optional[BaseException]:
+        """The error from the last generation attempt for a data version, if it failed recently"""
+        with self._lock:
+            failure = self._failures.get(version)
+            if failure is None:
+                return None
+            failed_at, error = failure
+            if time.monotonic() - failed_at >= self.FAILURE_BACKOFF_SECONDS:
+                del self._failures[version]
+                return None
+            return error
+
+    def is_pending(self, version: str) -> bool:
+        return version in self._pending
+
+    def submit(self, events: list, version: Optional[str] = None) -> Future:
+        """Queue report generation on the background worker.
+
+        Cached versions resolve immediately; a version whose generation failed
+        within ``FAILURE_BACKOFF_SECONDS`` resolves with that error instead of
+        being retried.
+        """
+        version = version or data_version(events)
+        cached = self.cached_report(version)
+        error = None if cached else self.failed_report(version)
+        if cached or error is not None:
+            future = Future()
+            if cached:
+                future.set_result(cached)
+            else:
+                future.set_exception(error)
+            return future
+
+        with self._lock:
+            future = self._pending.get(version)
+            if future is None:
+                future = self._worker().submit(self._generate, events, version)
+                self._pending[version] = future
+                future.add_done_callback(lambda f: self._finish(version, f))
+        return future
+
+    def _worker(self) -> ThreadPoolExecutor:
+        """Background executor, recreated after a fork (threads do not survive it)"""
+        if self._executor is None or self._executor_pid != os.getpid():
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="report")
+            self._executor_pid = os.getpid()
+            self._pending = {}
+        return self._executor
+
+    def generate(self, events: list, version: Optional[str] = None) -> Dict[str, Path]:
+        """Generate (or fetch from cache) the report synchronously"""
+        return self.submit(events, version).result()
+
+    def _finish(self, version: str, future: Future):
+        error = future.exception()
+        if error is not None:
+            print(f"❌ Report generation failed for data version {version}: {error!r}")
+        with self._lock:
+            self._pending.pop(version, None)
+            if error is not None:
+                self._failures[version] = (time.monotonic(), error)
+
+    def _generate(self, events: list, version: str) -> Dict[str, Path]:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        # Dashboard workers share the output directory: one process renders a
+        # version while the others wait here and then pick up its files
+        with self._version_lock(version):
+            cached = self.cached_report(version)
+            if cached:
+                return cached
+
+            data = self.build_report_data(events)
+            charts = self.render_charts(data)
+            html = self.template_env.get_template("attribution_report.html").render(
+                version=version,
+                generated_at=datetime.now().strftime("%Y-%m-%d %H:%M"),
+                charts=charts,
+                **data
+            )
+
+            paths = self.report_paths(version)
+            # Write the PDF before the HTML: the HTML file marks the version as cached
+            self._write_pdf(html, paths["pdf"])
+            self._write_atomic(paths["html"], html.encode("utf-8"))
+            return self.cached_report(version)
+
+    @contextmanager
+    def _version_lock(self, version: str):
+        if fcntl is None:
+            yield
+            return
+        with open(self.output_dir / f"attribution_report_{version}.lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _write_atomic(self, path: Path, content: bytes):
+        """Write through a uniquely named temp file so concurrent writers never share one"""
+        with tempfile.NamedTemporaryFile(dir=self.output_dir, prefix=f".{path.name}.",
+                                         delete=False) as tmp:
+            tmp.write(content)
+        Path(tmp.name).replace(path)
+
+    def _write_pdf(self, html: str, path: Path):
+        try:
+            from weasyprint import HTML
+        except (ImportError, OSError) as e:
+            print(f"⚠️ PDF export unavailable, generating HTML only: {e}")
+            return
+        self._write_atomic(path, HTML(string=html, base_url=str(ROOT_DIR)).write_pdf())
+
+    def build_report_data(self, events: list) -> dict:
+        """Compute every attribution model, deal score and the forecast in one pass over deals.
+
+        Attribution is evaluated once per distinct canonical path and weighted by
+        the deal amount carried on that path.
+        """
+        journeys = group_journeys_by_deal(events)
+
+        # Rule-based models only see channels; the ML model also uses the rep
+        channel_paths = canonicalize_journeys(journeys, max_length=self.max_path_length)
+        rep_paths = canonicalize_journeys(journeys, max_length=self.max_path_length,
+                                          key_fields=("channel", "rep"))
+        attributed_revenue = {
+            name: self.attribution_engine.attribute_paths(
+                rep_paths if method == "ml_attribution" else channel_paths, method
+            )
+            for name, method in ATTRIBUTION_MODELS.items()
+        }
+
+        deals = deal_summaries(journeys)
+
+        scores = self.forecasting_engine.deal_probability_scoring(deals)
+        for deal, score in zip(deals, scores):
+            deal["probability"] = score["probability"]
+
+        forecast = self.forecasting_engine.pipeline_velocity_forecast(
+            deals, horizon_days=Config.FORECASTING_HORIZON_DAYS
+        )
+
+        channels = sorted({c for revenue in attributed_revenue.values() for c in revenue})
+        return {
+            "channels": channels,
+            "attributed_revenue": {name: {c: revenue.get(c, 0.0) for c in channels}
+                                   for name, revenue in attributed_revenue.items()},
+            "deals": sorted(deals, key=lambda d: d["probability"]),
+            "at_risk_deals": [d for d in deals if d["probability"] < 0.3],
+            "total_revenue": sum(d["amount"] for d in deals),
+            "forecast": forecast,
+            "horizon_days": Config.FORECASTING_HORIZON_DAYS
+        }
+
+    def render_charts(self, data: dict) -> Dict[str, str]:
+        """Render the report charts once as inline SVG, shared by the HTML and PDF outputs"""
+        return {
+            "attribution": self._grouped_bar_svg(data["channels"], data["attributed_revenue"])
+        }
+
+    @staticmethod
+    def _grouped_bar_svg(channels: list, series: Dict[str, Dict[str, float]],
+                         width: int = 720, height: int = 320) -> str:
+        margin = 40
+        peak = max([v for values in series.values() for v in values.values()] + [1.0])
+        group_width = (width - 2 * margin) / max(len(channels), 1)
+        bar_width = group_width * 0.8 / max(len(series), 1)
+        plot_height = height - 2 * margin
+
+        parts = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height + 20 * len(series)}">']
+        for i, channel in enumerate(channels):
+            x0 = margin + i * group_width + group_width * 0.1
+            for j, (name, values) in enumerate(series.items()):
+                bar_height = plot_height * values.get(channel, 0.0) / peak
+                parts.append(
+                    f'<rect x="{x0 + j * bar_width:.1f}" y="{height - margin - bar_height:.1f}" '
+                    f'width="{bar_width:.1f}" height="{bar_height:.1f}" '
+                    f'fill="{CHART_COLORS[j % len(CHART_COLORS)]}"/>'
+                )
+            parts.append(
+                f'<text x="{x0 + group_width * 0.4:.1f}" y="{height - margin + 16}" '
+                f'font-size="12" text-anchor="middle">{escape(channel)}</text>'
+            )
+        for j, name in enumerate(series):
+            y = height + 20 * j
+            parts.append(f'<rect x="{margin}" y="{y - 10}" width="10" height="10" '
+                         f'fill="{CHART_COLORS[j % len(CHART_COLORS)]}"/>')
+            parts.append(f'<text x="{margin + 16}" y="{y}" font-size="12">{escape(name)}</text>')
+        parts.append("</svg>")
+        return "".join(parts)
@@ -1,8 +1,15 @@
 # config/settings.py
 
+import os
+
 class Config:
     OLLAMA_HOST = "http://localhost:11434"
     FORECASTING_HORIZON_DAYS = 90
     DASH_PORT = 8050
     DATA_DIR = "data"
+    REPORTS_DIR = "reports"
+    TEMPLATES_DIR = "templates"
     MOCK_DATA_SIZE = 1000
+    # Build models/tables once in the gunicorn master and share them with workers
+    SHARED_STATE = os.getenv("REVOPS_SHARED_STATE", "0") == "1"
+    SHARED_STATE_PREFIX = os.getenv("REVOPS_SHARED_STATE_PREFIX", "revops")
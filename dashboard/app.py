@@ -6,24 +6,31 @@ import dash_bootstrap_components as dbc
 import plotly.express as px
 import pandas as pd
 from pathlib import Path
+import os
+import random
+from flask import send_file
 import sys
 
 # Add root to path
 sys.path.append(str(Path(__file__).parent.parent))
 
 # Import local modules
-from agents.data_collector import DataCollectorAgent
+from agents.data_collector import DataCollectorAgent, deal_summaries, group_journeys_by_deal
 from models.attribution_models import AttributionEngine
 from models.forecasting_models import ForecastingEngine
+from agents.report_generator import ReportGeneratorAgent, data_version
+from models.path_canonicalization import canonicalize_journeys
+from models.revenue_rollup import RevenueRollup, deal_dimensions
+from config.settings import Config
+from dashboard.shared_state import SharedStateStore
 
 # Initialize agents
-collector = DataCollectorAgent()
 attribution_engine = AttributionEngine()
 forecasting_engine = ForecastingEngine()
 
-# Generate mock journeys
+# Generate mock journeys; the collector is not kept, it holds its own reference to the list
 try:
-    journeys = collector.enrich_contact_journeys()
+    journeys = DataCollectorAgent().enrich_contact_journeys()
 except Exception as e:
     print(f"⚠️ Running in mock mode — no real data: {e}")
     journeys = [{
@@ -36,43 +43,141 @@ except Exception as e:
         "converted": random.random() > 0.5
     } for i in range(1, 10)]
 
-# Build channel performance
-channel_weights = {
-    "google": random.uniform(0.4, 0.8),
-    "linkedin": random.uniform(0.3, 0.7),
-    "email": random.uniform(0.1, 0.3),
-    "content": random.uniform(0.2, 0.4),
-    "direct": random.uniform(0.2, 0.5)
-}
+# Cache key for reports; hashing the whole store is O(events), so do it once per load
+journeys_version = data_version(journeys)
+
+# Build channel performance from revenue-weighted attribution
+def build_channel_weights(journeys):
+    deal_journeys = group_journeys_by_deal(journeys)
+    revenue_rollup = RevenueRollup.from_paths(
+        canonicalize_journeys(deal_journeys),
+        attribution_engine.linear_attribution,
+        dimensions=deal_dimensions(deal_journeys)
+    )
+    return revenue_rollup.channel_shares()
 
 # Build forecast data
-try:
-    forecast_data = forecasting_engine.time_series_forecast([
-        {"amount": j["amount"], "timestamp": j["timestamp"]} for j in journeys
-    ])
-except Exception as e:
-    forecast_data = [240000, 260000, 220000]
+def build_forecast(journeys):
+    try:
+        return forecasting_engine.time_series_forecast([
+            {"amount": j["amount"], "timestamp": j["timestamp"]} for j in journeys
+        ])
+    except Exception as e:
+        return [240000, 260000, 220000]
 
-# Build deal probabilities
-try:
-    deal_probabilities = forecasting_engine.deal_probability_scoring(journeys)
-except Exception as e:
-    deal_probabilities = [{
-        "deal_id": "D4",
-        "probability": 0.19,
-        "rep": "Rep D",
-        "channel": "email"
-    }]
+channel_weights = build_channel_weights(journeys)
+forecast_data = build_forecast(journeys)
+
+# Build deal probabilities from one scoring row per deal
+def score_deals(journeys):
+    try:
+        return forecasting_engine.deal_probability_scoring(
+            deal_summaries(group_journeys_by_deal(journeys))
+        )
+    except Exception as e:
+        print(f"⚠️ Deal scoring failed, showing sample data: {e}")
+        return [{
+            "deal_id": "D4",
+            "probability": 0.19,
+            "rep": "Rep D",
+            "channel": "email"
+        }]
 
 # Build risk table
-risk_deals = pd.DataFrame([
-    {
-        "Deal ID": d["deal_id"],
-        "Probability": f"{d['probability']:.2%}",
-        "Channel": d["channel"],
-        "Rep": d["rep"]
-    } for d in deal_probabilities if d["probability"] < 0.3
-])
+def build_risk_deals(deal_probabilities):
+    return pd.DataFrame([
+        {
+            "Deal ID": d["deal_id"],
+            "Probability": f"{d['probability']:.2%}",
+            "Channel": d["channel"],
+            "Rep": d["rep"]
+        } for d in deal_probabilities if d["probability"] < 0.3
+    ])
+
+deal_probabilities = score_deals(journeys)
+risk_deals = build_risk_deals(deal_probabilities)
+
+# Shared-state mode: under gunicorn --preload this runs once in the master and
+# forked workers read models and tables zero-copy from shared memory
+shared_state = None
+
+def publish_shared_state(journeys, version, risk_deals, channel_weights, forecast_data):
+    """Publish compiled models and every dashboard table as one generation for all workers"""
+    return shared_state.publish(
+        forests={
+            "attribution": attribution_engine.compiled_model,
+            "forecasting": forecasting_engine.compiled_model
+        },
+        tables={
+            "journeys": pd.DataFrame(journeys),
+            "risk_deals": risk_deals,
+            "channel_weights": pd.DataFrame({
+                "channel": list(channel_weights), "share": list(channel_weights.values())
+            }),
+            "forecast": pd.DataFrame({"forecast": forecast_data})
+        },
+        meta={"data_version": version}
+    )
+
+def current_snapshot():
+    """Latest shared generation, with the engines pointed at its compiled models"""
+    snapshot = shared_state.snapshot()
+    attribution_engine.compiled_model = snapshot.forests["attribution"]
+    forecasting_engine.compiled_model = snapshot.forests["forecasting"]
+    return snapshot
+
+def current_view():
+    """Channel weights, forecast and risk table, all read from the same generation"""
+    if shared_state is None:
+        return channel_weights, forecast_data, risk_deals
+    tables = current_snapshot().tables
+    weights = tables["channel_weights"]
+    return (
+        dict(zip(weights.column("channel"), weights.column("share").tolist())),
+        tables["forecast"].column("forecast").tolist(),
+        tables["risk_deals"].to_frame()
+    )
+
+def current_journeys():
+    if shared_state is None:
+        return journeys
+    return current_snapshot().tables["journeys"].to_frame().to_dict("records")
+
+if Config.SHARED_STATE:
+    # Namespaced by master pid: workers inherit the store, and a second master
+    # (e.g. a gunicorn USR2 upgrade) never shares or unlinks these blocks
+    shared_state = SharedStateStore(f"{Config.SHARED_STATE_PREFIX}_{os.getpid()}", create=True)
+    attribution_engine.compile_model()
+    forecasting_engine.compile_model()
+    publish_shared_state(journeys, journeys_version, risk_deals, channel_weights, forecast_data)
+    current_snapshot()
+    # Predictions now go through the shared compiled forests; drop the library models
+    attribution_engine.model = None
+    forecasting_engine.model = None
+
+report_generator = ReportGeneratorAgent(attribution_engine, forecasting_engine)
+
+def current_version():
+    if shared_state is None:
+        return journeys_version
+    return current_snapshot().meta["data_version"]
+
+def warm_report_cache():
+    """Start generating the report for the current data so downloads are served from cache.
+
+    In shared-state mode this must run in a worker after fork (see
+    dashboard/gunicorn.conf.py), never in the master: a running report thread
+    would be forked into every worker.
+    """
+    version = current_version()
+    if report_generator.cached_report(version) is None and not report_generator.is_pending(version):
+        report_generator.submit(current_journeys(), version)
+
+if shared_state is None:
+    warm_report_cache()
+else:
+    # Workers read these from shared memory instead of inheriting private copies
+    del journeys, deal_probabilities, risk_deals, channel_weights, forecast_data
 
 # Build app
 app = dash.Dash(
@@ -83,22 +188,77 @@ app = dash.Dash(
 
 server = app.server
 
-app.layout = dbc.Container([
-    dbc.Row(dbc.Col(html.H1("AI Revenue Attribution & Forecasting Engine"), className="mb-4 
-text-center")),
+@server.route("/reports/latest.<fmt>")
+def download_report(fmt):
+    """Serve the cached report for the current data, or queue it if not ready yet"""
+    version = current_version()
+    cached = report_generator.cached_report(version)
+    if cached is None:
+        error = report_generator.failed_report(version)
+        if error is not None:
+            return f"Report generation failed: {error}", 500
+        if not report_generator.is_pending(version):
+            report_generator.submit(current_journeys(), version)
+        return "Report is being generated, please retry shortly", 202
+    if fmt not in cached:
+        return f"Report format '{fmt}' is not available", 404
+    return send_file(cached[fmt])
+
+def channel_figure(weights):
+    return px.bar(
+        x=list(weights), y=list(weights.values()),
+        labels={"x": "Channel", "y": "Attributed Revenue Share"}
+    )
+
+def forecast_figure(forecast):
+    return px.line(y=forecast, labels={"index": "Period", "y": "Forecast Revenue"})
+
+def serve_layout():
+    """Built per page load so every worker shows the latest published data"""
+    weights, forecast, risk_table = current_view()
+    return dbc.Container([
+        dbc.Row(dbc.Col(html.H1("AI Revenue Attribution & Forecasting Engine"), className="mb-4 text-center")),
     
-    dbc.Row([
-        dbc.Col(dcc.Graph(id='channel-performance', figure=px.bar(...)), width=6),
-        dbc.Col(dcc.Graph(id='forecast-summary', figure=px.line(...)), width=6)
-    ]),
+        dbc.Row([
+            dbc.Col(dcc.Graph(id='channel-performance', figure=channel_figure(weights)), width=6),
+            dbc.Col(dcc.Graph(id='forecast-summary', figure=forecast_figure(forecast)), width=6)
+        ]),
     
-    dbc.Row([
-        dbc.Col(html.H3("At-Risk Deals (<30%)")),
-        dbc.Col(html.Div([dbc.Table.from_dataframe(risk_deals)]))
-    ]),
+        dbc.Row([
+            dbc.Col(html.H3("At-Risk Deals (<30%)")),
+            dbc.Col(html.Div([dbc.Table.from_dataframe(risk_table)], id="risk-table"))
+        ]),
     
-    dbc.Row([
-        dbc.Col(dbc.Button("Refresh Dashboard", id="refresh-btn", color="primary"))
-    ])
+        dbc.Row([
+            dbc.Col(dbc.Button("Refresh Dashboard", id="refresh-btn", color="primary")),
+            dbc.Col(dbc.Button("Download Report", href="/reports/latest.pdf", external_link=True,
+                               color="secondary"))
+        ])
 
-], fluid=True, style={"padding": "20px", "background-color": "#121212"})
+    ], fluid=True, style={"padding": "20px", "background-color": "#121212"})
+
+app.layout = serve_layout
+
+@app.callback(
+    Output("risk-table", "children"),
+    Output("channel-performance", "figure"),
+    Output("forecast-summary", "figure"),
+    Input("refresh-btn", "n_clicks"),
+    prevent_initial_call=True
+)
+def refresh_dashboard(n_clicks):
+    """Rebuild journeys and scores; in shared-state mode publish them to all workers"""
+    if shared_state is not None:
+        fresh_journeys = DataCollectorAgent().enrich_contact_journeys()
+        # Score with the currently published compiled models
+        current_snapshot()
+        fresh_version = data_version(fresh_journeys)
+        publish_shared_state(
+            fresh_journeys, fresh_version,
+            build_risk_deals(score_deals(fresh_journeys)),
+            build_channel_weights(fresh_journeys),
+            build_forecast(fresh_journeys)
+        )
+        report_generator.submit(fresh_journeys, fresh_version)
+    weights, forecast, risk_table = current_view()
+    return [dbc.Table.from_dataframe(risk_table)], channel_figure(weights), forecast_figure(forecast)
@@ -0,0 +1,23 @@
+# dashboard/gunicorn.conf.py
+#
+# gunicorn -c dashboard/gunicorn.conf.py dashboard.app:server
+
+import os
+
+# Build models and tables once in the master and share them with forked workers
+os.environ.setdefault("REVOPS_SHARED_STATE", "1")
+
+preload_app = True
+bind = f"0.0.0.0:{os.getenv('DASH_PORT', '8050')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "4"))
+
+def post_worker_init(worker):
+    """Warm the report cache from a worker; the master must not start threads before forking"""
+    from dashboard import app as dashboard_app
+    dashboard_app.warm_report_cache()
+
+def on_exit(server):
+    """Unlink the shared memory blocks when the master shuts down"""
+    from dashboard import app as dashboard_app
+    if dashboard_app.shared_state is not None:
+        dashboard_app.shared_state.close(unlink=True)
@@ -0,0 +1,249 @@
+# dashboard/shared_state.py
+
+import multiprocessing
+import os
+import pickle
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from models.compiled_trees import CompiledForest
+from models.shared_arrays import align, array_layout, read_arrays, write_arrays
+
+_HEADER = np.dtype(np.int64).itemsize
+
+
+class SharedTable:
+    """Read-only column table backed by shared memory.
+
+    Numeric columns are zero-copy views. String columns are int32 codes into a
+    label set that also lives in the block, as UTF-8 bytes plus an offsets array,
+    so no per-row Python objects are created until a column is decoded. Missing
+    values have code -1 and decode to ``None``.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray], columns: List[tuple], rows: int):
+        self._arrays = arrays
+        self._kinds = dict(columns)
+        self.columns = [name for name, _ in columns]
+        self.rows = rows
+
+    def __len__(self) -> int:
+        return self.rows
+
+    @staticmethod
+    def encode(frame: pd.DataFrame) -> tuple:
+        """Split a DataFrame into flat arrays and the column metadata"""
+        arrays = {}
+        columns = []
+        for name in frame.columns:
+            series = frame[name]
+            if series.dtype.kind in "biuf":
+                arrays[name] = np.ascontiguousarray(series.to_numpy())
+                columns.append((name, "numeric"))
+                continue
+
+            codes, labels = pd.factorize(series)
+            encoded = [str(label).encode("utf-8") for label in labels]
+            offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+            np.cumsum([len(b) for b in encoded], out=offsets[1:])
+            arrays[name] = codes.astype(np.int32)
+            arrays[f"{name}.offsets"] = offsets
+            arrays[f"{name}.utf8"] = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+            columns.append((name, "string"))
+        return arrays, {"columns": columns, "rows": len(frame)}
+
+    def codes(self, name: str) -> np.ndarray:
+        """Raw stored array for a column (label codes for string columns)"""
+        return self._arrays[name]
+
+    def labels(self, name: str) -> List[str]:
+        """Decode the distinct labels of a string column"""
+        offsets = self._arrays[f"{name}.offsets"]
+        data = self._arrays[f"{name}.utf8"].tobytes()
+        return [data[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(len(offsets) - 1)]
+
+    def column(self, name: str) -> np.ndarray:
+        if self._kinds[name] == "numeric":
+            return self._arrays[name]
+        # Code -1 (missing) picks the trailing None
+        return np.asarray(self.labels(name) + [None], dtype=object)[self._arrays[name]]
+
+    def to_frame(self) -> pd.DataFrame:
+        """Materialize a private pandas copy, e.g. for rendering a table"""
+        return pd.DataFrame({name: self.column(name) for name in self.columns})
+
+
+class SharedSnapshot:
+    """One published generation: compiled forests and tables over a single block"""
+
+    def __init__(self, generation: int, forests: Dict[str, CompiledForest],
+                 tables: Dict[str, SharedTable], meta: Dict[str, Any],
+                 shm: shared_memory.SharedMemory):
+        self.generation = generation
+        self.meta = meta
+        self.forests = forests
+        self.tables = tables
+        self._shm = shm
+
+    def release(self) -> bool:
+        """Drop this process's mapping; returns False while views are still referenced"""
+        self.forests, self.tables = {}, {}
+        try:
+            self._shm.close()
+        except BufferError:
+            return False
+        return True
+
+
+class SharedStateStore:
+    """Models and tables shared across forked dashboard workers.
+
+    The master builds the state once and ``publish``es it: everything goes into a
+    new shared memory block named after the next generation, and only then is the
+    generation counter in the small control block bumped. Workers call
+    ``snapshot()``, which re-attaches only when the counter has moved, so readers
+    always see a complete generation. The previous generation is kept alive for
+    readers that are still attaching; older ones are unlinked.
+
+    Create the store in the master before workers fork (e.g. gunicorn
+    ``preload_app``) so the publish lock is shared by all processes. The prefix
+    must be unique to that master: creating a store over an existing control
+    block fails, and only the creating process unlinks blocks on ``close``.
+    """
+
+    def __init__(self, prefix: str = "revops", create: bool = False):
+        self.prefix = prefix
+        self._control = self._open_control(create)
+        self._owner_pid = os.getpid() if create else None
+        self._generation = np.ndarray(1, dtype=np.int64, buffer=self._control.buf)
+        self._lock = multiprocessing.Lock()
+        self._snapshot: Optional[SharedSnapshot] = None
+        self._retired: List[SharedSnapshot] = []
+
+    def _open_control(self, create: bool) -> shared_memory.SharedMemory:
+        name = f"{self.prefix}_control"
+        if not create:
+            return shared_memory.SharedMemory(name=name)
+        try:
+            control = shared_memory.SharedMemory(name=name, create=True, size=_HEADER)
+        except FileExistsError:
+            raise FileExistsError(
+                f"Shared state '{name}' already exists; another process owns this prefix "
+                f"(or a crashed one left it behind in /dev/shm)"
+            ) from None
+        np.ndarray(1, dtype=np.int64, buffer=control.buf)[0] = 0
+        return control
+
+    def _block_name(self, generation: int) -> str:
+        return f"{self.prefix}_g{generation}"
+
+    @property
+    def generation(self) -> int:
+        return int(self._generation[0])
+
+    def publish(self, forests: Optional[Dict[str, CompiledForest]] = None,
+                tables: Optional[Dict[str, pd.DataFrame]] = None,
+                meta: Optional[Dict[str, Any]] = None) -> int:
+        """Write a new generation and make it visible atomically; returns its number.
+
+        ``meta`` is a small picklable dict (e.g. a data version) published alongside.
+        """
+        arrays: Dict[str, np.ndarray] = {}
+        manifest: Dict[str, Any] = {"forests": {}, "tables": {}, "meta": meta or {}}
+
+        for name, forest in (forests or {}).items():
+            forest_arrays, forest_meta = forest.to_arrays()
+            arrays.update({f"forest:{name}:{k}": v for k, v in forest_arrays.items()})
+            manifest["forests"][name] = forest_meta
+
+        for name, frame in (tables or {}).items():
+            table_arrays, table_meta = SharedTable.encode(frame)
+            arrays.update({f"table:{name}:{k}": v for k, v in table_arrays.items()})
+            manifest["tables"][name] = table_meta
+
+        manifest["layout"], size = array_layout(arrays)
+        payload = pickle.dumps(manifest)
+        base = align(_HEADER + len(payload))
+
+        with self._lock:
+            generation = self.generation + 1
+            shm = shared_memory.SharedMemory(name=self._block_name(generation), create=True,
+                                             size=base + max(size, 1))
+            np.ndarray(1, dtype=np.int64, buffer=shm.buf)[0] = len(payload)
+            shm.buf[_HEADER:_HEADER + len(payload)] = payload
+            write_arrays(shm.buf, arrays, manifest["layout"], base)
+            shm.close()
+
+            self._generation[0] = generation
+            self._unlink_generation(generation - 2)
+        return generation
+
+    def snapshot(self) -> SharedSnapshot:
+        """Current generation, attached zero-copy; cached until a newer one is published"""
+        for _ in range(3):
+            generation = self.generation
+            if generation == 0:
+                raise LookupError("No shared state has been published yet")
+            if self._snapshot is not None and self._snapshot.generation == generation:
+                return self._snapshot
+            try:
+                snapshot = self._attach(generation)
+            except FileNotFoundError:
+                # Superseded and unlinked while we were attaching; read the counter again
+                continue
+            self._retire(self._snapshot)
+            self._snapshot = snapshot
+            return snapshot
+        raise LookupError("Shared state is being republished too quickly to attach")
+
+    def _attach(self, generation: int) -> SharedSnapshot:
+        shm = shared_memory.SharedMemory(name=self._block_name(generation))
+        length = int(np.ndarray(1, dtype=np.int64, buffer=shm.buf)[0])
+        manifest = pickle.loads(bytes(shm.buf[_HEADER:_HEADER + length]))
+        arrays = read_arrays(shm.buf, manifest["layout"], align(_HEADER + length))
+
+        def group(kind: str, name: str) -> Dict[str, np.ndarray]:
+            prefix = f"{kind}:{name}:"
+            return {k[len(prefix):]: v for k, v in arrays.items() if k.startswith(prefix)}
+
+        forests = {name: CompiledForest.from_arrays(group("forest", name), meta)
+                   for name, meta in manifest["forests"].items()}
+        tables = {name: SharedTable(group("table", name), meta["columns"], meta["rows"])
+                  for name, meta in manifest["tables"].items()}
+        return SharedSnapshot(generation, forests, tables, manifest["meta"], shm)
+
+    def _retire(self, snapshot: Optional[SharedSnapshot]):
+        if snapshot is not None:
+            self._retired.append(snapshot)
+        self._retired = [s for s in self._retired if not s.release()]
+
+    def _unlink_generation(self, generation: int):
+        if generation <= 0:
+            return
+        try:
+            block = shared_memory.SharedMemory(name=self._block_name(generation))
+        except FileNotFoundError:
+            return
+        block.close()
+        block.unlink()
+
+    def close(self, unlink: bool = False):
+        """Detach from shared memory; the owning master passes ``unlink=True`` on shutdown.
+
+        ``unlink`` is ignored outside the process that created the store, so a
+        forked worker can never remove blocks the master still serves.
+        """
+        unlink = unlink and self._owner_pid == os.getpid()
+        generation = self.generation
+        self._retire(self._snapshot)
+        self._snapshot = None
+        if unlink:
+            for old in (generation, generation - 1):
+                self._unlink_generation(old)
+        self._generation = None
+        self._control.close()
+        if unlink:
+            self._control.unlink()
@@ -1,13 +1,18 @@
 # models/attribution_models.py
 
 from collections import defaultdict
+import random
 import numpy as np
 from sklearn.ensemble import RandomForestRegressor
 from typing import List, Dict, Any
 
+from models.compiled_trees import CompiledForest
+from models.path_canonicalization import CanonicalPaths, path_channel_shares
+
 class AttributionEngine:
     def __init__(self):
         self.model = self._train_ml_attribution_model()
+        self.compiled_model = None
         self.feature_weights = {
             "touchpoint_order": 0.2,
             "time_between_touches": 0.1,
@@ -96,6 +101,17 @@ class AttributionEngine:
         model.fit(X, y)
         return model
 
+    def compile_model(self) -> CompiledForest:
+        """Export the trained forest to flat arrays and use it for ML attribution"""
+        self.compiled_model = CompiledForest.from_random_forest(self.model)
+        return self.compiled_model
+
+    def _predict_weights(self, feature_vectors):
+        """Predict touchpoint weights with the compiled forest when available"""
+        if self.compiled_model is not None:
+            return self.compiled_model.predict(feature_vectors)
+        return self.model.predict(feature_vectors)
+
     def ml_attribution(self, journey):
         """Use ML to determine optimal attribution based on full journey"""
         if not journey:
@@ -110,6 +126,8 @@ class AttributionEngine:
             200000 / 1e5  # Default normalized deal value
         ]
 
+        channels = []
+        feature_vectors = []
         for event in journey:
             channel = event["channel"]
             rep = event.get("rep", "Rep A")
@@ -125,8 +143,28 @@ class AttributionEngine:
                 deal_value / 1e5
             ]
 
-            weight = self.model.predict([feature_vector])[0]
+            channels.append(channel)
+            feature_vectors.append(feature_vector)
+
+        for channel, weight in zip(channels, self._predict_weights(feature_vectors)):
             touchpoint_weights[channel] += max(0.01, weight)
 
         total_weight = sum(touchpoint_weights.values())
         return {k: v / total_weight for k, v in touchpoint_weights.items()}
+
+    def attribute_paths(self, paths: CanonicalPaths, model: str = "linear_attribution",
+                        weight: str = "amount") -> Dict[str, float]:
+        """Roll up a model over canonical paths, evaluating it once per distinct path.
+
+        ``weight="amount"`` returns attributed revenue per channel; ``weight="count"``
+        returns attributed deal counts (path multiplicity).
+        """
+        if weight == "amount":
+            path_weights = paths.path_revenue()
+        elif weight == "count":
+            path_weights = paths.multiplicity.astype(float)
+        else:
+            raise ValueError(f"Unknown weight: {weight}")
+
+        channels, shares = path_channel_shares(paths, getattr(self, model))
+        return dict(zip(channels, (path_weights @ shares).tolist()))
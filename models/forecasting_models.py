@@ -6,9 +6,12 @@ from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, roc_auc_score
 import random
 
+from models.compiled_trees import CompiledForest
+
 class ForecastingEngine:
     def __init__(self):
         self.model = self._train_ml_model()
+        self.compiled_model = None
 
     def _train_ml_model(self):
         """Train an XGBoost model for deal scoring"""
@@ -57,11 +60,25 @@ class ForecastingEngine:
 
         return np.array(X), np.array(y)
 
+    def compile_model(self) -> CompiledForest:
+        """Export the trained booster to flat arrays and use it for deal scoring"""
+        self.compiled_model = CompiledForest.from_xgboost(self.model)
+        return self.compiled_model
+
+    def _predict_proba(self, feature_vectors):
+        """Predict class probabilities with the compiled booster when available"""
+        if self.compiled_model is not None:
+            return self.compiled_model.predict_proba(feature_vectors)
+        return self.model.predict_proba(np.array(feature_vectors, dtype=float))
+
     def deal_probability_scoring(self, journeys: list):
         """Score deals using trained XGBoost model"""
-        results = []
+        if not journeys:
+            return []
+
+        feature_vectors = []
         for j in journeys:
-            feature_vector = [
+            feature_vectors.append([
                 j["touchpoints"],
                 j["deal_age"],
                 {"google": 0.8, "linkedin": 0.5, "email": 0.3, "content": 0.2, "direct": 
@@ -69,9 +86,11 @@ class ForecastingEngine:
                 {"Rep A": 0.9, "Rep B": 0.7, "Rep C": 0.4, "Rep D": 0.25}.get(j.get("rep", "Rep A"), 
 0.7),
                 j["amount"]
-            ]
+            ])
 
-            predicted_prob = self.model.predict_proba([feature_vector])[0][1]
+        probabilities = self._predict_proba(feature_vectors)[:, 1]
+        results = []
+        for j, predicted_prob in zip(journeys, probabilities):
             results.append({
                 "deal_id": j["deal_id"],
                 "probability": max(0.05, min(0.95, predicted_prob)),
@@ -80,3 +99,20 @@ class ForecastingEngine:
             })
 
         return results
+
+    def pipeline_velocity_forecast(self, scored_deals: list, horizon_days: int = 90):
+        """Forecast revenue over a horizon from pipeline velocity of scored deals"""
+        if not scored_deals:
+            return {"weighted_pipeline": 0.0, "velocity_per_day": 0.0, "forecast": 0.0}
+
+        amounts = np.array([d["amount"] for d in scored_deals], dtype=float)
+        probabilities = np.array([d["probability"] for d in scored_deals], dtype=float)
+        cycle_days = max(1.0, float(np.mean([d["deal_age"] for d in scored_deals])))
+
+        # velocity = deals × win rate × average deal size / sales cycle length
+        velocity = len(amounts) * probabilities.mean() * amounts.mean() / cycle_days
+        return {
+            "weighted_pipeline": float(np.dot(amounts, probabilities)),
+            "velocity_per_day": float(velocity),
+            "forecast": float(velocity * horizon_days)
+        }
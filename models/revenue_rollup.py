@@ -0,0 +1,86 @@
+# models/revenue_rollup.py
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from models.path_canonicalization import CanonicalPaths, path_channel_shares
+
+
+def deal_dimensions(journeys: Dict[str, list]) -> Dict[str, list]:
+    """Per-deal group-by labels (rep, stage, cohort month) in journey order"""
+    dimensions = {"rep": [], "stage": [], "cohort": []}
+    for journey in journeys.values():
+        dimensions["rep"].append(journey[-1].get("rep", "Unknown"))
+        dimensions["stage"].append(journey[-1].get("stage", "Unknown"))
+        dimensions["cohort"].append(str(journey[0].get("timestamp", "Unknown"))[:7])
+    return dimensions
+
+
+class RevenueRollup:
+    """Attributed revenue slices from a sparse deals × channels credit matrix.
+
+    ``credit[d, c]`` is the share of deal ``d`` credited to channel ``c``. Revenue
+    per channel is ``credit.T @ amounts``; group-by dimensions are sparse
+    groups × deals indicator matrices applied to the amount-weighted credit.
+    """
+
+    def __init__(self, credit: sparse.spmatrix, channels: List[str], deal_ids: list,
+                 amounts: np.ndarray, dimensions: Optional[Dict[str, list]] = None):
+        self.credit = sparse.csr_matrix(credit)
+        self.channels = list(channels)
+        self.deal_ids = list(deal_ids)
+        self.amounts = np.asarray(amounts, dtype=float)
+        self.dimensions = dimensions or {}
+        self.revenue = sparse.csr_matrix(self.credit.multiply(self.amounts[:, None]))
+        self._indicators: Dict[str, Tuple[list, sparse.csr_matrix]] = {}
+
+    @classmethod
+    def from_paths(cls, paths: CanonicalPaths, model,
+                   dimensions: Optional[Dict[str, list]] = None) -> "RevenueRollup":
+        """Build per-deal credit from canonical paths, evaluating ``model`` once per path"""
+        channels, shares = path_channel_shares(paths, model)
+        deal_to_path = sparse.csr_matrix(
+            (np.ones(paths.n_deals), (np.arange(paths.n_deals), paths.path_index)),
+            shape=(paths.n_deals, paths.n_paths)
+        )
+        credit = deal_to_path @ sparse.csr_matrix(shares)
+        return cls(credit, channels, paths.deal_ids, paths.amounts, dimensions)
+
+    def indicator(self, dimension: str) -> Tuple[list, sparse.csr_matrix]:
+        """Group labels and the groups × deals 0/1 matrix for a dimension"""
+        if dimension not in self._indicators:
+            if dimension not in self.dimensions:
+                raise KeyError(f"Unknown dimension: {dimension}")
+            groups, group_index = np.unique(np.asarray(self.dimensions[dimension], dtype=str),
+                                            return_inverse=True)
+            matrix = sparse.csr_matrix(
+                (np.ones(len(group_index)), (group_index, np.arange(len(group_index)))),
+                shape=(len(groups), len(group_index))
+            )
+            self._indicators[dimension] = (groups.tolist(), matrix)
+        return self._indicators[dimension]
+
+    def channel_revenue(self) -> Dict[str, float]:
+        """Attributed revenue per channel across all deals"""
+        totals = self.credit.T @ self.amounts
+        return dict(zip(self.channels, totals.tolist()))
+
+    def revenue_by(self, dimension: str, value: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+        """Attributed revenue per channel for each group of a dimension (or a single group)"""
+        groups, matrix = self.indicator(dimension)
+        if value is not None:
+            row = groups.index(value)
+            groups, matrix = [value], matrix[row]
+        table = (matrix @ self.revenue).toarray()
+        return {
+            group: dict(zip(self.channels, table[i].tolist()))
+            for i, group in enumerate(groups)
+        }
+
+    def channel_shares(self) -> Dict[str, float]:
+        """Fraction of total attributed revenue per channel"""
+        revenue = self.channel_revenue()
+        total = sum(revenue.values())
+        return {c: (v / total if total else 0.0) for c, v in revenue.items()}
@@ -0,0 +1,39 @@
+# models/shared_arrays.py
+
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# (name, dtype string, length, byte offset relative to the start of the array area)
+ArrayLayout = List[Tuple[str, str, int, int]]
+
+
+def align(offset: int, alignment: int = 8) -> int:
+    return -(-offset // alignment) * alignment
+
+
+def array_layout(arrays: Dict[str, np.ndarray]) -> Tuple[ArrayLayout, int]:
+    """Place 1-D arrays back to back (8-byte aligned); returns the layout and total size"""
+    layout = []
+    offset = 0
+    for name, array in arrays.items():
+        offset = align(offset)
+        layout.append((name, array.dtype.str, len(array), offset))
+        offset += array.nbytes
+    return layout, offset
+
+
+def write_arrays(buf, arrays: Dict[str, np.ndarray], layout: ArrayLayout, base: int = 0):
+    """Copy arrays into a buffer at the positions given by ``array_layout``"""
+    for name, dtype, length, offset in layout:
+        np.ndarray(length, dtype=dtype, buffer=buf, offset=base + offset)[:] = arrays[name]
+
+
+def read_arrays(buf, layout: ArrayLayout, base: int = 0) -> Dict[str, np.ndarray]:
+    """Read-only zero-copy views of arrays written by ``write_arrays``"""
+    arrays = {}
+    for name, dtype, length, offset in layout:
+        array = np.ndarray(length, dtype=dtype, buffer=buf, offset=base + offset)
+        array.flags.writeable = False
+        arrays[name] = array
+    return arrays
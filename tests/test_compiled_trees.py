@@ -0,0 +1,41 @@
+# tests/test_compiled_trees.py
+
+import numpy as np
+from models.attribution_models import AttributionEngine
+from models.forecasting_models import ForecastingEngine
+from models.compiled_trees import CompiledForest
+
+def _random_features(n, scale):
+    rng = np.random.default_rng(0)
+    return rng.uniform(0, 1, size=(n, len(scale))) * np.array(scale)
+
+def test_compiled_random_forest_matches_sklearn():
+    """Compiled attribution forest reproduces RandomForestRegressor predictions"""
+    engine = AttributionEngine()
+    compiled = engine.compile_model()
+    X = _random_features(500, [6, 1, 1, 1, 5])
+    np.testing.assert_allclose(compiled.predict(X), engine.model.predict(X), atol=1e-9)
+
+def test_compiled_xgboost_matches_predict_proba():
+    """Compiled scoring booster reproduces XGBClassifier probabilities"""
+    engine = ForecastingEngine()
+    compiled = engine.compile_model()
+    X = _random_features(500, [6, 180, 1, 1, 500_000])
+    np.testing.assert_allclose(compiled.predict_proba(X), engine.model.predict_proba(X), atol=1e-5)
+
+    X[::7, 1] = np.nan
+    np.testing.assert_allclose(compiled.predict_proba(X), engine.model.predict_proba(X), atol=1e-5)
+
+def test_compiled_forest_shared_memory_roundtrip():
+    """A forest attached from shared memory predicts like the original"""
+    engine = ForecastingEngine()
+    compiled = engine.compile_model()
+    shm, spec = compiled.to_shared_memory()
+    try:
+        attached = CompiledForest.from_shared_memory(spec)
+        X = _random_features(50, [6, 180, 1, 1, 500_000])
+        np.testing.assert_array_equal(attached.predict(X), compiled.predict(X))
+        attached.close()
+    finally:
+        shm.close()
+        shm.unlink()
@@ -0,0 +1,42 @@
+# tests/test_path_canonicalization.py
+
+from collections import defaultdict
+from agents.data_collector import DataCollectorAgent, group_journeys_by_deal
+from models.attribution_models import AttributionEngine
+from models.path_canonicalization import canonicalize_journeys
+
+def _journey(deal_id, channels, amount):
+    return [{"deal_id": deal_id, "channel": c, "amount": amount} for c in channels]
+
+def test_repeated_journeys_collapse_to_one_path():
+    """Deals sharing a channel sequence map to one path with matching multiplicity"""
+    journeys = {
+        "D1": _journey("D1", ["google", "email"], 100.0),
+        "D2": _journey("D2", ["google", "email"], 300.0),
+        "D3": _journey("D3", ["linkedin", "google", "email"], 50.0)
+    }
+    paths = canonicalize_journeys(journeys)
+    assert paths.n_paths == 2
+    assert sorted(paths.multiplicity.tolist()) == [1, 2]
+    assert sorted(paths.path_revenue().tolist()) == [50.0, 400.0]
+
+    capped = canonicalize_journeys(journeys, max_length=2)
+    assert capped.n_paths == 1
+    assert capped.multiplicity.tolist() == [3]
+
+def test_path_rollup_matches_per_deal_attribution():
+    """Rolling up distinct paths gives the same revenue as attributing every deal"""
+    journeys = group_journeys_by_deal(DataCollectorAgent().enrich_contact_journeys())
+    engine = AttributionEngine()
+    paths = canonicalize_journeys(journeys)
+
+    for model in ["first_touch_attribution", "linear_attribution", "time_decay_attribution"]:
+        expected = defaultdict(float)
+        for journey in journeys.values():
+            for channel, share in getattr(engine, model)(journey).items():
+                expected[channel] += share * journey[-1]["amount"]
+
+        rolled_up = engine.attribute_paths(paths, model)
+        assert rolled_up.keys() == expected.keys()
+        for channel, revenue in expected.items():
+            assert abs(rolled_up[channel] - revenue) < 1e-6 * max(revenue, 1.0)
@@ -0,0 +1,57 @@
+# tests/test_report_generator.py
+
+from agents.data_collector import DataCollectorAgent, group_journeys_by_deal
+from agents.report_generator import ReportGeneratorAgent, ATTRIBUTION_MODELS, data_version
+
+def test_report_covers_all_models_and_is_cached(tmp_path):
+    """Report computes every attribution model and reuses output for the same data version"""
+    events = DataCollectorAgent().enrich_contact_journeys()
+    generator = ReportGeneratorAgent(output_dir=tmp_path)
+
+    paths = generator.generate(events)
+    html = paths["html"].read_text()
+    assert data_version(events) in paths["html"].name
+    for model in ATTRIBUTION_MODELS:
+        assert model in html
+
+    mtime = paths["html"].stat().st_mtime_ns
+    cached = generator.submit(events)
+    assert cached.done()
+    assert cached.result()["html"].stat().st_mtime_ns == mtime
+
+def test_report_revenue_matches_deal_amounts(tmp_path):
+    """Every attribution model distributes exactly the total deal amount"""
+    events = DataCollectorAgent().enrich_contact_journeys()
+    data = ReportGeneratorAgent(output_dir=tmp_path).build_report_data(events)
+    for revenue in data["attributed_revenue"].values():
+        assert abs(sum(revenue.values()) - data["total_revenue"]) < 1e-6 * data["total_revenue"]
+
+def test_failed_report_is_retried_after_backoff(tmp_path):
+    """A failing version is reported instead of regenerated until its backoff expires"""
+    generator = ReportGeneratorAgent(output_dir=tmp_path)
+    calls = []
+
+    def failing_build(events):
+        calls.append(events)
+        raise RuntimeError("boom")
+
+    generator.build_report_data = failing_build
+    first = generator.submit([], "v1")
+    assert isinstance(first.exception(timeout=30), RuntimeError)
+    generator._worker().submit(lambda: None).result()  # let the done callback settle
+
+    assert isinstance(generator.failed_report("v1"), RuntimeError)
+    assert isinstance(generator.submit([], "v1").exception(), RuntimeError)
+    assert len(calls) == 1
+
+    generator.FAILURE_BACKOFF_SECONDS = 0
+    assert generator.failed_report("v1") is None
+    assert isinstance(generator.submit([], "v1").exception(timeout=30), RuntimeError)
+    assert len(calls) == 2
+
+def test_deal_age_comes_from_the_events(tmp_path):
+    """Deal scoring sees the collector's deal age, not the span between touches"""
+    events = DataCollectorAgent().enrich_contact_journeys()
+    data = ReportGeneratorAgent(output_dir=tmp_path).build_report_data(events)
+    ages = {deal_id: journey[-1]["deal_age"] for deal_id, journey in group_journeys_by_deal(events).items()}
+    assert all(d["deal_age"] == ages[d["deal_id"]] for d in data["deals"])
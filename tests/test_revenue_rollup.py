@@ -0,0 +1,32 @@
+# tests/test_revenue_rollup.py
+
+from agents.data_collector import DataCollectorAgent, group_journeys_by_deal
+from models.attribution_models import AttributionEngine
+from models.path_canonicalization import canonicalize_journeys
+from models.revenue_rollup import RevenueRollup, deal_dimensions
+
+def _rollup():
+    journeys = group_journeys_by_deal(DataCollectorAgent().enrich_contact_journeys())
+    engine = AttributionEngine()
+    paths = canonicalize_journeys(journeys)
+    rollup = RevenueRollup.from_paths(paths, engine.linear_attribution, deal_dimensions(journeys))
+    return engine, paths, rollup
+
+def test_channel_revenue_matches_path_rollup():
+    """Sparse credit × amount reproduces the path-level attributed revenue"""
+    engine, paths, rollup = _rollup()
+    expected = engine.attribute_paths(paths, "linear_attribution")
+    for channel, revenue in rollup.channel_revenue().items():
+        assert abs(revenue - expected[channel]) < 1e-6 * max(revenue, 1.0)
+    assert abs(sum(rollup.channel_shares().values()) - 1.0) < 1e-9
+
+def test_group_by_dimensions_sum_to_total():
+    """Every dimension partitions the attributed revenue across its groups"""
+    _, _, rollup = _rollup()
+    total = rollup.amounts.sum()
+    for dimension in ["rep", "stage", "cohort"]:
+        by_group = rollup.revenue_by(dimension)
+        assert abs(sum(sum(ch.values()) for ch in by_group.values()) - total) < 1e-6 * total
+
+        group = next(iter(by_group))
+        assert rollup.revenue_by(dimension, group) == {group: by_group[group]}
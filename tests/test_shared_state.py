@@ -0,0 +1,117 @@
+# tests/test_shared_state.py
+
+import multiprocessing
+import os
+import subprocess
+import sys
+import uuid
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from dashboard.shared_state import SharedStateStore, SharedTable
+from models.forecasting_models import ForecastingEngine
+
+def _read_in_child(store, queue):
+    snapshot = store.snapshot()
+    risk = snapshot.tables["risk_deals"]
+    queue.put((snapshot.generation, list(risk.column("Deal ID")), float(risk.column("Amount").sum())))
+
+def test_publish_and_read_across_processes():
+    """Forked workers read the published generation and pick up republished data"""
+    engine = ForecastingEngine()
+    forest = engine.compile_model()
+    risk_deals = pd.DataFrame({"Deal ID": ["D1", "D2"], "Amount": [100.0, 250.0]})
+
+    store = SharedStateStore(prefix=f"revops_test_{uuid.uuid4().hex[:8]}", create=True)
+    try:
+        assert store.publish(forests={"forecasting": forest}, tables={"risk_deals": risk_deals}) == 1
+
+        X = np.array([[3, 60, 0.8, 0.9, 250000], [1, 170, 0.2, 0.25, 20000]], dtype=float)
+        shared_forest = store.snapshot().forests["forecasting"]
+        np.testing.assert_array_equal(shared_forest.predict(X), forest.predict(X))
+        assert not shared_forest.value.flags.writeable
+        del shared_forest
+
+        ctx = multiprocessing.get_context("fork")
+        queue = ctx.Queue()
+        child = ctx.Process(target=_read_in_child, args=(store, queue))
+        child.start()
+        assert queue.get(timeout=30) == (1, ["D1", "D2"], 350.0)
+        child.join()
+
+        store.publish(tables={"risk_deals": risk_deals.iloc[:1]})
+        snapshot = store.snapshot()
+        assert snapshot.generation == 2
+        assert snapshot.tables["risk_deals"].to_frame().equals(risk_deals.iloc[:1])
+    finally:
+        store.close(unlink=True)
+
+def test_string_labels_live_in_the_block():
+    """String labels are stored as UTF-8 arrays; the pickled metadata only names column kinds"""
+    frame = pd.DataFrame({"Rep": ["Zoë", None, "Rep B", "Zoë"], "Amount": [1, 2, 3, 4]})
+    arrays, meta = SharedTable.encode(frame)
+    assert meta == {"columns": [("Rep", "string"), ("Amount", "numeric")], "rows": 4}
+
+    table = SharedTable(arrays, meta["columns"], meta["rows"])
+    assert table.labels("Rep") == ["Zoë", "Rep B"]
+    assert list(table.column("Rep")) == ["Zoë", None, "Rep B", "Zoë"]
+    assert table.to_frame().equals(frame)
+
+def _close_in_child(store):
+    store.close(unlink=True)
+
+def test_prefix_is_owned_by_its_creator():
+    """A second store cannot adopt a live prefix, and only the creator unlinks it"""
+    prefix = f"revops_test_{uuid.uuid4().hex[:8]}"
+    store = SharedStateStore(prefix=prefix, create=True)
+    try:
+        store.publish(tables={"risk_deals": pd.DataFrame({"Amount": [1.0]})})
+        with pytest.raises(FileExistsError):
+            SharedStateStore(prefix=prefix, create=True)
+
+        child = multiprocessing.get_context("fork").Process(target=_close_in_child, args=(store,))
+        child.start()
+        child.join()
+        assert store.snapshot().tables["risk_deals"].column("Amount")[0] == 1.0
+    finally:
+        store.close(unlink=True)
+
+_DASHBOARD_CHECK = """
+from dashboard import app
+
+def find_event_lists(obj, path, seen, depth=0):
+    if id(obj) in seen or depth > 4 or type(obj).__name__ == "module":
+        return []
+    seen.add(id(obj))
+    if isinstance(obj, list) and obj and isinstance(obj[0], dict) and {"deal_id", "timestamp"} <= obj[0].keys():
+        return [path]
+    if isinstance(obj, dict):
+        children = obj.items()
+    elif isinstance(obj, (list, tuple)):
+        children = enumerate(obj)
+    else:
+        children = getattr(obj, "__dict__", {}).items()
+    return [found for key, child in children
+            for found in find_event_lists(child, f"{path}.{key}", seen, depth + 1)]
+
+try:
+    seen = set()
+    assert not [found for name, value in vars(app).items()
+                for found in find_event_lists(value, name, seen)]
+    journeys = app.current_journeys()
+    deals = app.group_journeys_by_deal(journeys)
+    assert len(app.score_deals(journeys)) == len(deals)
+finally:
+    app.shared_state.close(unlink=True)
+"""
+
+def test_dashboard_master_keeps_no_private_event_list():
+    """After publishing, the master holds no journey list that workers would inherit"""
+    env = dict(os.environ, REVOPS_SHARED_STATE="1",
+               REVOPS_SHARED_STATE_PREFIX=f"revops_test_{uuid.uuid4().hex[:8]}")
+    result = subprocess.run([sys.executable, "-c", _DASHBOARD_CHECK], env=env,
+                            cwd=Path(__file__).parent.parent, capture_output=True, text=True,
+                            timeout=300)
+    assert result.returncode == 0, result.stderr